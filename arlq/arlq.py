@@ -1,6 +1,7 @@
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import argparse
+import bisect
 import curses
 import math
 import sys
@@ -22,11 +23,14 @@ TILE_WIDTH = 6
 TILE_HEIGHT = 4
 TILE_NUM_X = 10
 TILE_NUM_Y = 4
-FIELD_WIDTH = (TILE_WIDTH + 1) * TILE_NUM_X + 1
-FIELD_HEIGHT = (TILE_HEIGHT + 1) * TILE_NUM_Y + 1
+TILE_PITCH_X = TILE_WIDTH + 1  # distance between the left walls of horizontally adjacent tiles
+TILE_PITCH_Y = TILE_HEIGHT + 1
+FIELD_WIDTH = TILE_PITCH_X * TILE_NUM_X + 1
+FIELD_HEIGHT = TILE_PITCH_Y * TILE_NUM_Y + 1
 CORRIDOR_V_WIDTH = 3
 CORRIDOR_H_WIDTH = 2
 WALL_CHARS = "###"  # cross, horizontal, vertical
+FLOOR_CODE = ord(" ")  # value of a floor cell in the field
 
 FOOD_MAX = 100
 FOOD_INIT = 90
@@ -58,6 +62,17 @@ FAIRY_TORCH_EXTENSION = 2
 CHAR_DRAGON = "D"
 CHAR_TREASURE = "T"
 
+# Display attributes. The ones made of color pairs are set by init_attrs.
+ATTR_PLAYER = curses.A_BOLD
+ATTR_UNSEEN = curses.A_DIM
+ATTR_WALL = 0
+ATTR_TREASURE = 0
+
+# draw_stage handles the attributes as codes, which are indices of STAGE_ATTRS.
+# Codes 0, 1 and 2 are for the floor, unseen cells and walls. The list is filled by init_attrs.
+STAGE_ATTRS: List[int] = []
+STAGE_ATTR_CODES: Dict[int, int] = {}  # attribute -> code
+
 
 Point = Tuple[int, int]
 Edge = Tuple[Point, Point]
@@ -68,61 +83,60 @@ class MyRandom:
         self._value = self.seed = seed
 
     def randrange(self, r):
-        self._value = (1103515245 * self._value + 12345) % (2 ** 32)
+        self._value = (1103515245 * self._value + 12345) & 0xFFFFFFFF
         return self._value % r
 
     def choice(self, items):
-        i = self.randrange(len(items))
-        return items[i]
+        # Same as items[self.randrange(len(items))], with the LCG step inlined
+        self._value = (1103515245 * self._value + 12345) & 0xFFFFFFFF
+        return items[self._value % len(items)]
 
 
 rand: MyRandom = None
 
 
 def gen_maze(width: int, height: int) -> List[Edge]:
-    # Returns a list of neighboring points given a point p
-    def neighbor_points(p):
-        x, y = p
-        return [(x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)]
-
-    # Returns True if the given point p is within the bounds of the maze
-    def is_within_bounds(p):
-        return 0 <= p[0] < width and 0 <= p[1] < height
-
     # Initialize the maze generation process
-    unconnected_point_set = set((x, y) for y in range(height) for x in range(width))
+    unconnected = bytearray(b"\x01" * (width * height))  # unconnected[y * width + x] is 1 while the point (x, y) is not connected
     connecting_points = []
-    done_points = []
+    done_count = 0  # number of points that have no unconnected neighbor left
     edges = []
 
     # Choose a random starting point
-    first_point = cur_p = rand.choice(list(unconnected_point_set))
-    unconnected_point_set.remove(cur_p)
+    first_point = last_point = cur_p = (rand.randrange(width), rand.randrange(height))
+    unconnected[cur_p[1] * width + cur_p[0]] = 0
     connecting_points.append(cur_p)
 
     # Keep generating until all points have been connected
-    while len(done_points) < width * height:
+    while done_count < width * height:
         # Choose a random connecting point
         i = rand.randrange(len(connecting_points))
         cur_p = connecting_points[i]
 
-        # Find neighboring points that haven't been connected yet
-        nps = neighbor_points(cur_p)
-        unconnected_nps = [np for np in nps if is_within_bounds(np) and np in unconnected_point_set]
+        # Find neighboring points (within the bounds of the maze) that haven't been connected yet
+        cx, cy = cur_p
+        unconnected_nps = [
+            (nx, ny)
+            for nx, ny in ((cx, cy - 1), (cx, cy + 1), (cx - 1, cy), (cx + 1, cy))
+            if 0 <= nx < width and 0 <= ny < height and unconnected[ny * width + nx]
+        ]
 
         # If there are no unconnected neighboring points, remove this point from the connecting points list
+        # (by moving the last point into its slot, as the order of the connecting points does not matter)
         if not unconnected_nps:
-            done_points.append(cur_p)
-            del connecting_points[i]
+            done_count += 1
+            connecting_points[i] = connecting_points[-1]
+            connecting_points.pop()
             continue
 
         # Choose a random unconnected neighboring point and connect it
         last_point = selected_np = rand.choice(unconnected_nps)
-        unconnected_point_set.remove(selected_np)
+        unconnected[selected_np[1] * width + selected_np[0]] = 0
         connecting_points.append(selected_np)
 
-        # Add the edge between the current point and the selected neighboring point to the list of edges
-        edges.append((cur_p, selected_np))
+        # Add the edge between the current point and the selected neighboring point to the list of edges,
+        # with the smaller point first
+        edges.append((cur_p, selected_np) if cur_p < selected_np else (selected_np, cur_p))
 
     # Return the list of edges that connect all points in the maze
     return edges, first_point, last_point
@@ -147,18 +161,32 @@ def gen_maze(width: int, height: int) -> List[Edge]:
 # visualize_maze(width, height, edges)
 
 
+TAG_PLAYER = 0
+TAG_MONSTER = 1
+TAG_TREASURE = 2
+
+
 class Entity:
+    __slots__ = ("x", "y")
+    TAG = -1  # one of TAG_*, to tell the kind of an entity without isinstance
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
 
 class Treasure(Entity):
+    __slots__ = ()
+    TAG = TAG_TREASURE
+
     def __init__(self, x, y):
         super().__init__(x, y)
 
 
 class Player(Entity):
+    __slots__ = ("level", "food", "item", "item_taken_from", "companion", "attack")
+    TAG = TAG_PLAYER
+
     def __init__(self, x, y, level, food):
         super().__init__(x, y)
         self.level = level
@@ -166,9 +194,13 @@ class Player(Entity):
         self.item = ""
         self.item_taken_from = ""
         self.companion = ""
+        self.attack = level  # player_attack_by_level(self), to be updated when the level or the item changes
 
 
 class Monster(Entity):
+    __slots__ = ("kind",)
+    TAG = TAG_MONSTER
+
     def __init__(self, x, y, kind):
         super().__init__(x, y)
         self.kind = kind
@@ -182,6 +214,8 @@ class MonsterKind:
         self.effect = effect
         self.feed = feed
         self.companion = companion
+        self.attr_beatable = 0  # set by init_attrs
+        self.attr_unbeatable = 0
 
 
 # Combine monster_data and item_data into a single dict
@@ -212,97 +246,146 @@ MONSTER_KIND_POPULATION: Dict[str, int] = {
     "f": 1,
 }
 
+# Kinds and numbers of the monsters spawned in every game, in the order of spawning
+MONSTER_SPAWN_PLAN: List[Tuple[MonsterKind, int]] = [(mk, MONSTER_KIND_POPULATION[mk.char]) for mk in MONSTER_KINDS]
+
+# Monster kinds that can be fought, sorted by level, and their levels (for bisect)
+LEVELED_MONSTER_KINDS: List[MonsterKind] = sorted((mk for mk in MONSTER_KINDS if mk.level > 0), key=lambda mk: mk.level)
+LEVELED_MONSTER_KIND_LEVELS: List[int] = [mk.level for mk in LEVELED_MONSTER_KINDS]
+
+# Bit of each monster kind char and of the treasure char, in the bitmask of the encountered types
+CHAR_BITS: Dict[str, int] = {
+    ch: 1 << i for i, ch in enumerate([mk.char for mk in MONSTER_KINDS + RARE_MONSTER_KINDS] + [CHAR_TREASURE])
+}
+
+
+def init_attrs() -> None:
+    # Set the display attributes made of color pairs. Call this after the color pairs are initialized.
+    global ATTR_WALL, ATTR_TREASURE
+
+    ATTR_WALL = curses.color_pair(CI_GREEN)
+    ATTR_TREASURE = curses.color_pair(CI_YELLOW) | curses.A_BOLD
+    for mk in MONSTER_KINDS + RARE_MONSTER_KINDS:
+        attr = curses.A_BOLD if "A" <= mk.char <= "Z" else 0
+        mk.attr_beatable = curses.color_pair(CI_BLUE) | attr
+        mk.attr_unbeatable = curses.color_pair(CI_RED) | attr
+
+    STAGE_ATTRS[:] = [0, ATTR_UNSEEN, ATTR_WALL, ATTR_PLAYER, ATTR_TREASURE]
+    for mk in MONSTER_KINDS + RARE_MONSTER_KINDS:
+        STAGE_ATTRS.extend([mk.attr_beatable, mk.attr_unbeatable])
+    STAGE_ATTR_CODES.clear()
+    for code, attr in enumerate(STAGE_ATTRS):
+        STAGE_ATTR_CODES.setdefault(attr, code)
+
 
 def place_to_tile(x: int, y: int) -> Point:
-    return (x - 1) // (TILE_WIDTH + 1), (y - 1) // (TILE_HEIGHT)
+    return (x - 1) // TILE_PITCH_X, (y - 1) // TILE_PITCH_Y
 
 
 def tile_to_place_range(x: int, y: int) -> Tuple[Point, Point]:
-    lt = (x * (TILE_WIDTH + 1) + 1, y * (TILE_HEIGHT + 1) + 1)
+    lt = (x * TILE_PITCH_X + 1, y * TILE_PITCH_Y + 1)
     rb = (lt[0] + TILE_WIDTH, lt[1] + TILE_HEIGHT)
     return lt, rb
 
 
-def find_random_place_in_range(field: List[List[str]], left_top: Point, right_bottom: Point) -> Point:
+def find_random_place_in_range(field: bytearray, left_top: Point, right_bottom: Point) -> Point:
     assert left_top[0] < right_bottom[0]
     assert left_top[1] < right_bottom[1]
 
     x = rand.randrange(right_bottom[0] - left_top[0]) + left_top[0]
     y = rand.randrange(right_bottom[1] - left_top[1]) + left_top[1]
-    assert field[y][x] == " "
+    assert field[y * FIELD_WIDTH + x] == FLOOR_CODE
 
     return x, y
 
 
-def find_random_place(objects: List[Entity], field: List[List[str]], distance: int = 2, place_range: Optional[Tuple[Point, Point]] = None) -> Point:
-    places = [(o.x, o.y) for o in objects]
-    while True:
-        x = rand.randrange(FIELD_WIDTH - 2) + 1
-        y = rand.randrange(FIELD_HEIGHT - 2) + 1
-        if (
-            field[y][x] == " "
-            and field[y][x + 1] == " "
-            and not any(abs(p[0] - x) <= distance and abs(p[1] - y) <= distance for p in places)
-        ):
-            return x, y
+def find_floor_places(field: bytearray) -> List[Point]:
+    # Returns the places where an entity can be put, that is, the floor cells whose right-hand cell is also a floor
+    return [
+        (x, y)
+        for y in range(1, FIELD_HEIGHT - 1)
+        for x in range(1, FIELD_WIDTH - 1)
+        if field[y * FIELD_WIDTH + x] == FLOOR_CODE and field[y * FIELD_WIDTH + x + 1] == FLOOR_CODE
+    ]
+
 
+def find_random_place(pos_to_obj: Dict[Point, Entity], floor_places: List[Point], distance: int = 2, place_range: Optional[Tuple[Point, Point]] = None) -> Point:
+    def is_free(p: Point) -> bool:
+        x, y = p
+        return not any((x + dx, y + dy) in pos_to_obj for dy in range(-distance, distance + 1) for dx in range(-distance, distance + 1))
+
+    for _ in range(len(floor_places) * 2):
+        p = rand.choice(floor_places)
+        if is_free(p):
+            return p
+
+    # The field is too crowded to hit a free place by chance, so pick one of all the free places
+    free_places = [p for p in floor_places if is_free(p)]
+    assert free_places, "no place to put an object"
+    return rand.choice(free_places)
 
-def spawn_monsters(objects: List[Entity], field: List[List[str]]) -> None:
+
+def spawn_monsters(monsters: List[Monster], pos_to_obj: Dict[Point, Entity], floor_places: List[Point]) -> None:
     """
     Spawn monsters in the game by finding random places on the field.
 
     Args:
-    - objects: a list of objects in the game
-    - field: the game field
+    - monsters: a list of monsters in the game
+    - pos_to_obj: a dict mapping each place to the object there
+    - floor_places: the places where an object can be put (see find_floor_places)
 
-    This function modifies the objects list by adding newly spawned monsters.
+    This function modifies the monsters list and the pos_to_obj dict by adding newly spawned monsters.
     """
 
-    for kind in MONSTER_KINDS:
-        for _ in range(MONSTER_KIND_POPULATION[kind.char]):
-            x, y = find_random_place(objects, field, distance=3)
+    for kind, count in MONSTER_SPAWN_PLAN:
+        for _ in range(count):
+            x, y = find_random_place(pos_to_obj, floor_places, distance=3)
             m = Monster(x, y, kind)
-            objects.append(m)
+            monsters.append(m)
+            pos_to_obj[(x, y)] = m
     kind = rand.choice(RARE_MONSTER_KINDS)
-    x, y = find_random_place(objects, field, distance=3)
+    x, y = find_random_place(pos_to_obj, floor_places, distance=3)
     m = Monster(x, y, kind)
-    objects.append(m)
+    monsters.append(m)
+    pos_to_obj[(x, y)] = m
 
 
-def create_field(corridor_h_width: int, corridor_v_width: int, wall_chars: str) -> Tuple[List[List[str]], Point, Point]:
+def create_field(corridor_h_width: int, corridor_v_width: int, wall_chars: str) -> Tuple[bytearray, Point, Point]:
+    """
+    Create a field, which is a bytearray of FIELD_HEIGHT rows of FIELD_WIDTH cells.
+    The cell (x, y) is field[y * FIELD_WIDTH + x], either FLOOR_CODE or a code of wall_chars.
+    """
+
     # Create field filled with spaces
-    field = [[" " for _ in range(FIELD_WIDTH)] for _ in range(FIELD_HEIGHT)]
+    field = bytearray(b" " * (FIELD_WIDTH * FIELD_HEIGHT))
 
     # Create walls
+    wall_codes = wall_chars.encode("ascii")
     for ty in range(TILE_NUM_Y + 1):
-        y = ty * (TILE_HEIGHT + 1)
-        for x in range(0, FIELD_WIDTH):
-            field[y][x] = wall_chars[1]
+        y = ty * TILE_PITCH_Y
+        field[y * FIELD_WIDTH : (y + 1) * FIELD_WIDTH] = wall_codes[1:2] * FIELD_WIDTH
     for tx in range(TILE_NUM_X + 1):
-        x = tx * (TILE_WIDTH + 1)
-        for y in range(0, FIELD_HEIGHT):
-            field[y][x] = wall_chars[2]
+        x = tx * TILE_PITCH_X
+        field[x::FIELD_WIDTH] = wall_codes[2:3] * FIELD_HEIGHT
     for ty in range(TILE_NUM_Y + 1):
-        y = ty * (TILE_HEIGHT + 1)
-        for tx in range(TILE_NUM_X + 1):
-            x = tx * (TILE_WIDTH + 1)
-            field[y][x] = wall_chars[0]
+        y = ty * TILE_PITCH_Y
+        field[y * FIELD_WIDTH : (y + 1) * FIELD_WIDTH : TILE_PITCH_X] = wall_codes[0:1] * (TILE_NUM_X + 1)
 
     # Create corridors
     edges, first_p, last_p = gen_maze(TILE_NUM_X, TILE_NUM_Y)
     for edge in edges:
-        (x1, y1), (x2, y2) = sorted(edge)
+        (x1, y1), (x2, y2) = edge
         assert x1 <= x2
         assert y1 <= y2
         if y1 == y2:
             d = rand.randrange(TILE_HEIGHT + 1 - corridor_h_width) + 1
-            for y in range(corridor_h_width):
-                field[y1 * (TILE_HEIGHT + 1) + d + y][x2 * (TILE_WIDTH + 1)] = " "
+            i = (y1 * TILE_PITCH_Y + d) * FIELD_WIDTH + x2 * TILE_PITCH_X
+            field[i : i + corridor_h_width * FIELD_WIDTH : FIELD_WIDTH] = b" " * corridor_h_width
         else:
             assert x1 == x2
             d = rand.randrange(TILE_WIDTH + 1 - corridor_v_width) + 1
-            for x in range(corridor_v_width):
-                field[y2 * (TILE_HEIGHT + 1)][x1 * (TILE_WIDTH + 1) + d + x] = " "
+            i = y2 * TILE_PITCH_Y * FIELD_WIDTH + x1 * TILE_PITCH_X + d
+            field[i : i + corridor_v_width] = b" " * corridor_v_width
 
     r = tile_to_place_range(*first_p)
     first_p = find_random_place_in_range(field, r[0], r[1])
@@ -311,69 +394,143 @@ def create_field(corridor_h_width: int, corridor_v_width: int, wall_chars: str)
     return field, first_p, last_p
 
 
+def make_stage_tables(show_entities: bool) -> Tuple[bytes, bytes]:
+    """
+    Make the translation tables to render a row of the stage.
+    Each table maps a field cell code, plus 0x80 when the cell is torched, to the displayed char or to its attribute code.
+    """
+    chars = bytearray()
+    attr_codes = bytearray()
+    for c in range(256):
+        cell, is_torched = c & 0x7F, c & 0x80
+        if not is_torched and (not show_entities or cell == FLOOR_CODE):
+            chars.append(ord("."))
+            attr_codes.append(1)
+        else:
+            chars.append(cell)
+            attr_codes.append(0 if cell == FLOOR_CODE else 2)
+    return bytes(chars), bytes(attr_codes)
+
+
+STAGE_TABLES: Tuple[Tuple[bytes, bytes], Tuple[bytes, bytes]] = (make_stage_tables(False), make_stage_tables(True))
+
+
+class StageBuffer:
+    """
+    The stage as drawn on the screen, which draw_stage compares against to find the cells to redraw.
+    """
+
+    def __init__(self):
+        # Chars and attribute codes of each row. The initial rows never match a rendered row, so that the first draw repaints the whole stage.
+        self.chars: List[bytes] = [bytes(FIELD_WIDTH)] * FIELD_HEIGHT
+        self.attr_codes: List[bytes] = [bytes(FIELD_WIDTH)] * FIELD_HEIGHT
+        # (char, attr) of the cells covered by the entities
+        self.entity_cells: Dict[Point, Tuple[str, int]] = {}
+        self.show_entities: Optional[bool] = None
+
+
 def draw_stage(
     stdscr: curses.window,
-    objects: List[Entity],
-    field: List[List[str]],
-    torched: List[List[int]],
-    encountered_types: Set[str],
+    player: Player,
+    treasure: Treasure,
+    monsters: List[Monster],
+    field: bytearray,
+    torched: bytearray,
+    encountered_mask: int,
+    stage_buf: StageBuffer,
+    dirty_rows: Optional[Iterable[int]] = None,
     show_entities: Optional[bool] = False,
 ) -> None:
-    player, px, py = None, None, None
-    for o in objects:
-        if isinstance(o, Player):
-            player = o
-            px, py = player.x, player.y
-    assert player is not None and px is not None and py is not None
-
-    if player.companion:
-        stdscr.addstr(py, px + 1, "'", curses.A_BOLD)
-
-    for y, row in enumerate(field):
-        for x, cell in enumerate(row):
-            if (not show_entities or cell == " ") and torched[y][x] == 0:
-                stdscr.addstr(y, x, ".", curses.A_DIM)
-            elif cell != " ":
-                stdscr.addstr(y, x, cell, curses.color_pair(CI_GREEN))
-
-    stdscr.addstr(py, px, "@", curses.A_BOLD)
-
-    atk = player_attack_by_level(player)
-    for o in objects:
-        if isinstance(o, Monster):
-            m = o
-            if torched[m.y][m.x] == 0:
-                continue
+    """
+    Draw the field and the entities on the screen.
 
-            ch = m.kind.char
-            if m.kind.char not in encountered_types:
-                if show_entities:
-                    stdscr.addstr(m.y, m.x, ch)
-                else:
-                    stdscr.addstr(m.y, m.x, "?")
+    Only the rows that may have changed since the previous frame are rendered, that is, the rows in dirty_rows
+    (the rows whose torched cells have changed; None means all rows) and the rows where an entity has appeared,
+    disappeared or changed its looks. Each rendered row is compared with the cells in stage_buf, and only the
+    changed cells are written to the screen, one addstr per run of changed cells sharing the same attribute.
+    stage_buf is updated in place.
+
+    A row of the field is rendered by merging the field cells and the torched cells into one bytes (torched cells
+    get 0x80 added) and translating it with STAGE_TABLES, so that no Python code runs per cell unless the row has changed.
+    """
+    px, py = player.x, player.y
+
+    # Render the entities
+    entity_cells: Dict[Point, Tuple[str, int]] = {}
+    if player.companion and field[py * FIELD_WIDTH + px + 1] == FLOOR_CODE:
+        entity_cells[(px + 1, py)] = ("'", ATTR_PLAYER)
+
+    entity_cells[(px, py)] = ("@", ATTR_PLAYER)
+
+    atk = player.attack
+    for m in monsters:
+        kind = m.kind
+        ch = kind.char
+        if torched[m.y * FIELD_WIDTH + m.x] == 0:
+            if show_entities:
+                entity_cells[(m.x, m.y)] = (ch, ATTR_UNSEEN)
+        elif not encountered_mask & CHAR_BITS[ch]:
+            if show_entities:
+                entity_cells[(m.x, m.y)] = (ch, 0)
             else:
-                attr = curses.A_BOLD if "A" <= ch <= "Z" else 0
-                ci = CI_BLUE if m.kind.level <= atk else CI_RED
-                stdscr.addstr(m.y, m.x, ch, curses.color_pair(ci) | attr)
-        elif isinstance(o, Treasure):
-            t = o
-            if CHAR_TREASURE in encountered_types:
-                stdscr.addstr(t.y, t.x, CHAR_TREASURE, curses.color_pair(CI_YELLOW) | curses.A_BOLD)
-
-    if show_entities:
-        attr = curses.A_DIM
-        for o in objects:
-            if isinstance(o, Monster):
-                m = o
-                if torched[m.y][m.x] != 0:
-                    continue
-
-                ch = m.kind.char
-                stdscr.addstr(m.y, m.x, ch, attr)
-            elif isinstance(o, Treasure):
-                t = o
-                if CHAR_TREASURE not in encountered_types:
-                    stdscr.addstr(t.y, t.x, CHAR_TREASURE, attr)
+                entity_cells[(m.x, m.y)] = ("?", 0)
+        else:
+            entity_cells[(m.x, m.y)] = (ch, kind.attr_beatable if kind.level <= atk else kind.attr_unbeatable)
+
+    if encountered_mask & CHAR_BITS[CHAR_TREASURE]:
+        entity_cells[(treasure.x, treasure.y)] = (CHAR_TREASURE, ATTR_TREASURE)
+    elif show_entities:
+        entity_cells[(treasure.x, treasure.y)] = (CHAR_TREASURE, ATTR_UNSEEN)
+
+    # Find the rows to be rendered
+    if dirty_rows is None or show_entities != stage_buf.show_entities:
+        rows: Set[int] = set(range(FIELD_HEIGHT))
+    else:
+        prev_entity_cells = stage_buf.entity_cells
+        rows = set(dirty_rows)
+        rows.update(p[1] for p, c in entity_cells.items() if prev_entity_cells.get(p) != c)
+        rows.update(p[1] for p in prev_entity_cells if p not in entity_cells)
+
+    # Render the field of the rows, with the entities over it
+    char_table, attr_code_table = STAGE_TABLES[bool(show_entities)]
+    from_bytes = int.from_bytes
+    width = FIELD_WIDTH
+    cur_rows: Dict[int, Tuple[bytearray, bytearray]] = {}
+    for y in rows:
+        i = y * width
+        cells = from_bytes(field[i : i + width], "little") | from_bytes(torched[i : i + width], "little") << 7
+        cells_bytes = cells.to_bytes(width, "little")
+        cur_rows[y] = (bytearray(cells_bytes.translate(char_table)), bytearray(cells_bytes.translate(attr_code_table)))
+
+    for (x, y), (ch, attr) in entity_cells.items():
+        cur_row = cur_rows.get(y)
+        if cur_row is not None:
+            cur_row[0][x] = ord(ch)
+            cur_row[1][x] = STAGE_ATTR_CODES[attr]
+
+    # Write the changed cells to the screen
+    addstr = stdscr.addstr
+    stage_attrs = STAGE_ATTRS
+    for y, (chars, attr_codes) in cur_rows.items():
+        prev_chars = stage_buf.chars[y]
+        prev_attr_codes = stage_buf.attr_codes[y]
+        if chars == prev_chars and attr_codes == prev_attr_codes:
+            continue
+        x = 0
+        while x < width:
+            if chars[x] == prev_chars[x] and attr_codes[x] == prev_attr_codes[x]:
+                x += 1
+                continue
+            run_x = x
+            code = attr_codes[x]
+            while x < width and (chars[x] != prev_chars[x] or attr_codes[x] != prev_attr_codes[x]) and attr_codes[x] == code:
+                x += 1
+            addstr(y, run_x, chars[run_x:x].decode("ascii"), stage_attrs[code])
+        stage_buf.chars[y] = bytes(chars)
+        stage_buf.attr_codes[y] = bytes(attr_codes)
+
+    stage_buf.entity_cells = entity_cells
+    stage_buf.show_entities = show_entities
 
 
 def player_attack_by_level(player: Player) -> int:
@@ -385,7 +542,24 @@ def player_attack_by_level(player: Player) -> int:
         return player.level
 
 
-def draw_status_bar(stdscr: curses.window, player: Player, hours: int, message: Optional[str] = None, key_show_map: bool = False) -> None:
+STATUS_KEYS = "/[Q]uit/[R]estart"
+STATUS_KEYS_SHOW_MAP = "/[Q]uit/[R]estart/Show [M]ap"
+
+
+def draw_status_bar(
+    stdscr: curses.window,
+    player: Player,
+    hours: int,
+    message: Optional[str] = None,
+    key_show_map: bool = False,
+    drawn_lines: Optional[List[Optional[str]]] = None,
+) -> None:
+    """
+    Draw the status line and the message line below the field.
+
+    drawn_lines, if given, holds the two lines drawn by the previous call and is updated in place.
+    A line that is the same as the drawn one is not written again.
+    """
     if player.item == ITEM_SWORD:
         level_str = "LVL: %d x3" % player.level
         item_str = "+%s(%s)" % (player.item, player.item_taken_from)
@@ -396,15 +570,10 @@ def draw_status_bar(stdscr: curses.window, player: Player, hours: int, message:
         level_str = "LVL: %d" % player.level
         item_str = ""
 
-    beatable = None
-    atk = player_attack_by_level(player)
-    for mk in MONSTER_KINDS:
-        if mk.level == 0:
-            continue
-        if mk.level > atk:
-            break
-        beatable = mk
-    assert beatable is None or beatable.level <= player_attack_by_level(player)
+    atk = player.attack
+    i = bisect.bisect_right(LEVELED_MONSTER_KIND_LEVELS, atk)
+    beatable = LEVELED_MONSTER_KINDS[i - 1] if i > 0 else None
+    assert beatable is None or beatable.level <= atk
 
     buf = []
     buf.append("HRS: %d" % hours)
@@ -413,48 +582,71 @@ def draw_status_bar(stdscr: curses.window, player: Player, hours: int, message:
         buf.append("> %s" % beatable.char)
     buf.append("FOOD: %d" % player.food)
     buf.append(item_str)
-    if key_show_map:
-        buf.append("/[Q]uit/[R]estart/Show [M]ap")
-    else:
-        buf.append("/[Q]uit/[R]estart")
-    stdscr.addstr(FIELD_HEIGHT, 0, "  ".join(buf))
+    buf.append(STATUS_KEYS_SHOW_MAP if key_show_map else STATUS_KEYS)
 
     if player.item == ITEM_TREASURE or player.food <= 0:
         if not message:
             message = ''
         message += "  SEED: %d" % rand.seed
 
-    if message:
-        stdscr.addstr(FIELD_HEIGHT + 1, 0, message)
+    lines = ["  ".join(buf), message or ""]
+    for i, line in enumerate(lines):
+        if drawn_lines is not None:
+            if drawn_lines[i] == line:
+                continue
+            drawn_lines[i] = line
+        stdscr.move(FIELD_HEIGHT + i, 0)
+        stdscr.clrtoeol()
+        if line:
+            stdscr.addstr(FIELD_HEIGHT + i, 0, line)
+
+
+KEY_TO_DIR: Dict[int, Point] = {
+    ord("w"): (0, -1),
+    curses.KEY_UP: (0, -1),
+    ord("a"): (-1, 0),
+    curses.KEY_LEFT: (-1, 0),
+    ord("s"): (0, 1),
+    curses.KEY_DOWN: (0, 1),
+    ord("d"): (1, 0),
+    curses.KEY_RIGHT: (1, 0),
+}
 
 
 def key_to_dir(key: int) -> Optional[Point]:
-    dx, dy = 0, 0
-    if key in [ord("w"), curses.KEY_UP]:
-        dy = -1
-    elif key in [ord("a"), curses.KEY_LEFT]:
-        dx = -1
-    elif key in [ord("s"), curses.KEY_DOWN]:
-        dy = 1
-    elif key in [ord("d"), curses.KEY_RIGHT]:
-        dx = 1
-    else:
-        return None
-    return dx, dy
+    return KEY_TO_DIR.get(key)
+
+
+TORCH_SPANS: Dict[int, List[Tuple[int, int]]] = {}
+
+
+def torch_spans(torch_radius: int) -> List[Tuple[int, int]]:
+    # Returns the rows of the torch disk as (dy, w) pairs, each meaning that cells dx = -w .. w of row dy are lit
+    spans = TORCH_SPANS.get(torch_radius)
+    if spans is None:
+        spans = []
+        for dy in range(-torch_radius, torch_radius + 1):
+            w = int(math.sqrt((torch_radius * 1.1) ** 2 - dy**2) + 0.5)
+            spans.append((dy, w))
+        TORCH_SPANS[torch_radius] = spans
+    return spans
 
 
-def update_torched(torched: List[List[int]], player: Player, torch_radius: int) -> None:
+def update_torched(torched: bytearray, player: Player, torch_radius: int) -> range:
+    """
+    Light the cells within the torch radius around the player.
+    Returns the range of rows that may have been changed.
+    """
     if player.companion == COMPANION_FAIRY:
         torch_radius += FAIRY_TORCH_EXTENSION
 
-    for dy in range(-torch_radius, torch_radius + 1):
+    for dy, w in torch_spans(torch_radius):
         y = player.y + dy
         if 0 <= y < FIELD_HEIGHT:
-            w = int(math.sqrt((torch_radius * 1.1) ** 2 - dy**2) + 0.5)
-            for dx in range(-w, w + 1):
-                x = player.x + dx
-                if 0 <= x < FIELD_WIDTH:
-                    torched[y][x] = 1
+            x0 = max(0, player.x - w)
+            x1 = min(FIELD_WIDTH, player.x + w + 1)
+            torched[y * FIELD_WIDTH + x0 : y * FIELD_WIDTH + x1] = b"\x01" * (x1 - x0)
+    return range(max(0, player.y - torch_radius), min(FIELD_HEIGHT, player.y + torch_radius + 1))
 
 
 args_box: List[argparse.Namespace] = []
@@ -475,13 +667,18 @@ def curses_main(stdscr: curses.window) -> bool:
     # Set up the game
     corridor_h_width, corridor_v_width = (1, 2) if args.narrower_corridors else (CORRIDOR_H_WIDTH, CORRIDOR_V_WIDTH)
     field, first_p, last_p = create_field(corridor_h_width, corridor_v_width, WALL_CHARS)
-    torched: List[List[int]] = [[0 for _ in range(FIELD_WIDTH)] for _ in range(FIELD_HEIGHT)]
+    torched: bytearray = bytearray(FIELD_WIDTH * FIELD_HEIGHT)  # torched[y * FIELD_WIDTH + x] is 1 once the cell (x, y) has been lit, otherwise 0
     player: Player = Player(first_p[0], first_p[1], 1, FOOD_INIT)
-    objects: List[Entity] = [player]
     treasure: Treasure = Treasure(last_p[0], last_p[1])
-    objects.append(treasure)
-    spawn_monsters(objects, field)
-    encountered_types: Set[str] = set()
+    monsters: List[Monster] = []
+    floor_places: List[Point] = find_floor_places(field)
+    pos_to_obj: Dict[Point, Entity] = {(player.x, player.y): player, (treasure.x, treasure.y): treasure}
+    spawn_monsters(monsters, pos_to_obj, floor_places)
+    del pos_to_obj[(player.x, player.y)]  # the player is not tracked, as it steps onto the other objects
+    encountered_mask: int = 0  # bitmask of CHAR_BITS
+    stage_buf: StageBuffer = StageBuffer()
+    dirty_rows: Set[int] = set()  # rows whose torched cells have changed since the last draw
+    status_lines: List[Optional[str]] = [None, None]  # lines drawn by draw_status_bar
 
     torch_radius: int = 4
     if args.large_torch:
@@ -508,10 +705,10 @@ def curses_main(stdscr: curses.window) -> bool:
             break
 
         # Show the field
-        update_torched(torched, player, torch_radius)
-        stdscr.clear()
-        draw_stage(stdscr, objects, field, torched, encountered_types, show_entities=args.debug_show_entities)
-        draw_status_bar(stdscr, player, hours, message=message or flash_message)
+        dirty_rows.update(update_torched(torched, player, torch_radius))
+        draw_stage(stdscr, player, treasure, monsters, field, torched, encountered_mask, stage_buf, dirty_rows, show_entities=args.debug_show_entities)
+        dirty_rows.clear()
+        draw_status_bar(stdscr, player, hours, message=message or flash_message, drawn_lines=status_lines)
         stdscr.refresh()
         if flash_message:
             flash_message = None
@@ -527,97 +724,94 @@ def curses_main(stdscr: curses.window) -> bool:
 
             dx, dy = d
             new_x, new_y = player.x + dx, player.y + dy
-            if field[new_y][new_x] == " ":  # if the cell is not a wall
+            if field[new_y * FIELD_WIDTH + new_x] == FLOOR_CODE:  # if the cell is not a wall
                 player.x, player.y = new_x, new_y
                 break
 
         # Find encountered object
-        enc_obj_infos: List[Tuple[int, Entity]] = []
-        sur_obj_infos: List[Tuple[int, Entity]] = []
-        for i, o in enumerate(objects):
-            if not isinstance(o, Player):
-                dx = abs(o.x - player.x)
-                dy = abs(o.y - player.y)
-                if dx == 0 and dy == 0:
-                    enc_obj_infos.append((i, o))
-                elif dx <= 1 and dy <= 1:
-                    sur_obj_infos.append((i, o))
-        assert len(enc_obj_infos) <= 1
+        enc_obj: Optional[Entity] = pos_to_obj.get((player.x, player.y))
+        enc_tag = enc_obj.TAG if enc_obj is not None else None
+        sur_objs: List[Entity] = []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                o = pos_to_obj.get((player.x + dx, player.y + dy))
+                if o is not None and (dx != 0 or dy != 0):
+                    sur_objs.append(o)
 
         # Actions & events (combats, state changes, etc)
-        for enc_obj_i, enc_obj in enc_obj_infos:
-            if isinstance(enc_obj, Treasure):
-                if CHAR_DRAGON in encountered_types:
-                    encountered_types.add(CHAR_TREASURE)
-                    message = ">> Won the Treasure! <<"
-                    game_ends = True
-                    player.item = ITEM_TREASURE
-                    player.item_taken_from = ''
-                    break
-            elif isinstance(enc_obj, Monster):
-                m = enc_obj
-                encountered_types.add(m.kind.char)
-                player_attack = player_attack_by_level(player)
-
-                effect = m.kind.effect
-                if player_attack < m.kind.level:
-                    if effect == EFFECT_RANDOM_TRANSPORT:
-                        player.x, player.y = find_random_place(objects, field, distance=2)
-                    else:
-                        # respawn
-                        player.x, player.y = find_random_place(objects, field, distance=2)
-                        player.item = ""
-                        player.item_taken_from = ""
-                        player.food = min(player.food, FOOD_INIT)
-                        # flash_message = "-- Respawn."
+        if enc_tag == TAG_TREASURE:
+            if encountered_mask & CHAR_BITS[CHAR_DRAGON]:
+                encountered_mask |= CHAR_BITS[CHAR_TREASURE]
+                message = ">> Won the Treasure! <<"
+                game_ends = True
+                player.item = ITEM_TREASURE
+                player.item_taken_from = ''
+        elif enc_tag == TAG_MONSTER:
+            m = enc_obj
+            encountered_mask |= CHAR_BITS[m.kind.char]
+            effect = m.kind.effect
+            if player.attack < m.kind.level:
+                if effect == EFFECT_RANDOM_TRANSPORT:
+                    player.x, player.y = find_random_place(pos_to_obj, floor_places, distance=2)
                 else:
-                    if effect == EFFECT_RANDOM_TRANSPORT:
-                        pass  # do not change player level
+                    # respawn
+                    player.x, player.y = find_random_place(pos_to_obj, floor_places, distance=2)
+                    player.item = ""
+                    player.item_taken_from = ""
+                    player.food = min(player.food, FOOD_INIT)
+                    # flash_message = "-- Respawn."
+            else:
+                if effect == EFFECT_RANDOM_TRANSPORT:
+                    pass  # do not change player level
+                elif effect == EFFECT_SPECIAL_EXP:
+                    player.level += 7
+                else:
+                    player.level += 1
+
+                if m.kind.feed < 0:
+                    hours += -m.kind.feed
+                player.food = max(1, min(FOOD_MAX, player.food + m.kind.feed))
+
+                if m.kind.companion:
+                    player.companion = m.kind.companion
+
+                if effect == EFFECT_RANDOM_TRANSPORT:
+                    player.x, player.y = find_random_place(pos_to_obj, floor_places, distance=2)
+                    del pos_to_obj[(m.x, m.y)]
+                    m.x, m.y = player.x + 1, player.y
+                    pos_to_obj[(m.x, m.y)] = m
+                else:
+                    monsters.remove(m)
+                    del pos_to_obj[(m.x, m.y)]
+                    player.item = m.kind.item
+                    player.item_taken_from = m.kind.char
+
+                    if effect == EFFECT_CLAIRVOYANCE:
+                        dirty_rows.update(update_torched(torched, player, torch_radius * 4))
+                        flash_message = "-- Clairvoyance."
+                    elif effect == EFFECT_TREASURE_POINTER:
+                        encountered_mask |= CHAR_BITS[CHAR_TREASURE]
+                        flash_message = "-- Sparkle."
+                    elif effect == EFFECT_FEED_MUCH:
+                        flash_message = "-- Stuffed."
                     elif effect == EFFECT_SPECIAL_EXP:
-                        player.level += 7
-                    else:
-                        player.level += 1
-
-                    if m.kind.feed < 0:
-                        hours += -m.kind.feed
-                    player.food = max(1, min(FOOD_MAX, player.food + m.kind.feed))
-
-                    if m.kind.companion:
-                        player.companion = m.kind.companion
-
-                    if effect == EFFECT_RANDOM_TRANSPORT:
-                        player.x, player.y = find_random_place(objects, field, distance=2)
-                        m.x, m.y = player.x + 1, player.y
-                    else:
-                        del objects[enc_obj_i]
-                        player.item = m.kind.item
-                        player.item_taken_from = m.kind.char
-
-                        if effect == EFFECT_CLAIRVOYANCE:
-                            update_torched(torched, player, torch_radius * 4)
-                            flash_message = "-- Clairvoyance."
-                        elif effect == EFFECT_TREASURE_POINTER:
-                            encountered_types.add(CHAR_TREASURE)
-                            flash_message = "-- Sparkle."
-                        elif effect == EFFECT_FEED_MUCH:
-                            flash_message = "-- Stuffed."
-                        elif effect == EFFECT_SPECIAL_EXP:
-                            flash_message = "-- Special Exp."
-                        elif effect == EFFECT_STONED:
-                            flash_message = "-- Stoned."
-                            if player.companion == COMPANION_FAIRY:
-                                player.companion = ''
-
-        for sur_obj_i, sur_obj in sur_obj_infos:
-            if isinstance(sur_obj, Treasure):
-                if CHAR_DRAGON in encountered_types:
-                    encountered_types.add(CHAR_TREASURE)
-
-    update_torched(torched, player, torch_radius)
-
-    stdscr.clear()
-    draw_stage(stdscr, objects, field, torched, encountered_types, show_entities=args.debug_show_entities)
-    draw_status_bar(stdscr, player, hours, message=message or flash_message, key_show_map=True)
+                        flash_message = "-- Special Exp."
+                    elif effect == EFFECT_STONED:
+                        flash_message = "-- Stoned."
+                        if player.companion == COMPANION_FAIRY:
+                            player.companion = ''
+
+        player.attack = player_attack_by_level(player)
+
+        for sur_obj in sur_objs:
+            if sur_obj.TAG == TAG_TREASURE:
+                if encountered_mask & CHAR_BITS[CHAR_DRAGON]:
+                    encountered_mask |= CHAR_BITS[CHAR_TREASURE]
+
+    dirty_rows.update(update_torched(torched, player, torch_radius))
+
+    draw_stage(stdscr, player, treasure, monsters, field, torched, encountered_mask, stage_buf, dirty_rows, show_entities=args.debug_show_entities)
+    draw_status_bar(stdscr, player, hours, message=message or flash_message, key_show_map=True, drawn_lines=status_lines)
     stdscr.refresh()
 
     while True:
@@ -627,9 +821,8 @@ def curses_main(stdscr: curses.window) -> bool:
         elif key == ord("r"):
             return True  # restart
         elif key == ord("m"):
-            stdscr.clear()
-            draw_stage(stdscr, objects, field, torched, encountered_types, show_entities=True)
-            draw_status_bar(stdscr, player, hours, message=message or flash_message, key_show_map=True)
+            draw_stage(stdscr, player, treasure, monsters, field, torched, encountered_mask, stage_buf, show_entities=True)
+            draw_status_bar(stdscr, player, hours, message=message or flash_message, key_show_map=True, drawn_lines=status_lines)
             stdscr.refresh()
 
 
@@ -670,6 +863,7 @@ def main():
     curses.init_pair(CI_YELLOW, curses.COLOR_YELLOW, -1)  # treasure
     curses.init_pair(CI_BLUE, curses.COLOR_BLUE, -1)  # player
     curses.init_pair(CI_CYAN, curses.COLOR_CYAN, -1)  # monster
+    init_attrs()
 
     try:
         while True:
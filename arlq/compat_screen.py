@@ -48,14 +48,25 @@ getch = _Getch()
 
 
 class BaseScreen:
+    def __init__(self):
+        self._buf = []  # output written by print_text and clear, not yet sent to the terminal
+
     def print_text(self, x: int, y: int, text: str, attr: Optional[str] = None) -> None:
+        # The output is buffered until flush() or getch() is called, so call flush() before waiting without reading a key
         if attr is None:
-            print(colorama.Cursor.POS(x + 1, y + 1) + text, flush=True)
+            self._buf.append(colorama.Cursor.POS(x + 1, y + 1) + text)
         else:
-            print(colorama.Cursor.POS(x + 1, y + 1) + attr + text + colorama.Style.RESET_ALL, flush=True)
+            self._buf.append(colorama.Cursor.POS(x + 1, y + 1) + attr + text + colorama.Style.RESET_ALL)
 
     def clear(self) -> None:
-        print(colorama.ansi.clear_screen(), flush=True)
+        self._buf.append(colorama.ansi.clear_screen())
+
+    def flush(self) -> None:
+        # Send the buffered output to the terminal with a single write
+        if self._buf:
+            sys.stdout.write("".join(self._buf))
+            self._buf.clear()
+        sys.stdout.flush()
 
     def __enter__(self):
         raise NotImplementedError("__enter__ method should be implemented in the derived class")
@@ -64,6 +75,7 @@ class BaseScreen:
         raise NotImplementedError("__exit__ method should be implemented in the derived class")
 
     def getch(self) -> int:
+        self.flush()
         return getch()
 
 
@@ -73,6 +85,7 @@ if platform.system() == "Windows":
 
     class WindowsScreen(BaseScreen):
         def __init__(self):
+            super().__init__()
             self._stdin_handle = msvcrt.get_osfhandle(sys.stdin.fileno())
             self._mode = msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
             colorama.init()
@@ -81,6 +94,7 @@ if platform.system() == "Windows":
             return self
 
         def __exit__(self, exc_type, exc_val, exc_tb):
+            self.flush()
             msvcrt.setmode(self._stdin_handle, self._mode)
             colorama.deinit()
 
@@ -90,6 +104,7 @@ else:
 
     class LinuxScreen(BaseScreen):
         def __init__(self):
+            super().__init__()
             self._screen = curses.initscr()
             curses.noecho()
             curses.cbreak()
@@ -99,6 +114,7 @@ else:
             return self
 
         def __exit__(self, exc_type, exc_val, exc_tb):
+            self.flush()
             self._screen.keypad(False)
             curses.nocbreak()
             curses.echo()
@@ -119,6 +135,7 @@ def screen() -> BaseScreen:
 #             y = abs(x % 8 - 4)
 #             scr.clear()
 #             scr.print_text(x, y, '@', attr=colorama.Fore.BLUE)
+#             scr.flush()
 #             time.sleep(0.3)
 
 